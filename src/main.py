@@ -34,13 +34,16 @@ if uploaded_file is not None:
                 image_data = curr_json['images']
                 st.session_state.logger.info('load image data')
                 
-                for image_name, image_byte in image_data.items():
-                    try:
-                        image_text = st.session_state.image_ocr.convert_img_to_txt(image_byte)
+                try:
+                    image_texts = st.session_state.image_ocr.convert_images_to_txt(list(image_data.values()))
+                    for image_name, image_text in zip(list(image_data.keys()), image_texts):
                         json_data[curr_key]['images'][image_name] = image_text
-                        st.session_state.logger.info(f"Image {image_name} processed successfully.")
-                    except Exception as e:
-                        st.session_state.logger.error(f"Error processing image {image_name}: {e}")
+                        if image_text is None:
+                            st.session_state.logger.error(f"Error processing image {image_name}")
+                        else:
+                            st.session_state.logger.info(f"Image {image_name} processed successfully.")
+                except Exception as e:
+                    st.session_state.logger.error(f"Error processing images: {e}")
 
     st.write("업로드된 JSON 데이터:")
     st.json(json_data)
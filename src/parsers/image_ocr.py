@@ -2,59 +2,209 @@ import io
 import os
 import re
 import base64
+import hashlib
 import uuid
 import time
 import json
+import asyncio
+import multiprocessing
+import threading
+import torch
+import torch.nn.functional as F
 import requests
+import numpy as np
+from typing import Callable, List, Optional, Union
 from PIL import Image
 from google import genai
-from itertools import chain
+from functools import cached_property
+from cachetools import LRUCache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 from paddleocr import PaddleOCR
-from transformers import pipeline
-from transformers import AutoProcessor, AutoModelForImageTextToText
+from parsers.ocr_worker import build_ocr_model, init_ocr_worker, extract_text_in_worker, join_ocr_result
+from transformers import AutoModel, AutoProcessor, AutoModelForImageTextToText
 from langchain_community.document_loaders import AzureAIDocumentIntelligenceLoader
 from utils.logger import init_logger
-from utils.constants import IMAGE_CATEGORY, FORMULA_OCR_MESSAGE
+from utils.constants import LABEL_TO_CATEGORY, ALL_LABELS, FORMULA_OCR_MESSAGE
 
 
 load_dotenv()
 logger = init_logger(__file__, "DEBUG")
 
+CLASSIFIER_CHECKPOINT = "google/siglip2-base-patch16-224"
+# zero-shot-image-classification pipeline의 기본 hypothesis template
+CLASSIFIER_HYPOTHESIS = "This is a photo of {}."
+RESULT_CACHE_SIZE = 1024
+OCR_MAX_WORKERS = min(4, os.cpu_count() or 1)
+FORMULA_MAX_NEW_TOKENS = 500
+# 한 번의 generate에 넣는 formula 이미지 수 (이미지마다 최대 17개의 512px tile로 나뉘므로 메모리 상한)
+FORMULA_BATCH_SIZE = 4
+# SmolDocling forward를 torch.compile 할지 여부 (decode 속도는 빨라지지만 첫 호출 시 compile 시간 발생)
+FORMULA_MODEL_COMPILE = False
+GEMINI_MODEL = 'gemini-2.0-flash'
+GEMINI_MAX_CONCURRENCY = 8
+
+_FORMULA_PROMPT_RE = re.compile(
+    r"User:\s*Extract mathematical expressions in LaTeX format\s*Assistant: 0>0>500>500>")
+_FORMULA_TAIL_RE = re.compile(r"\\, \.$")
+
+# Clova OCR 호출 간 TCP/TLS connection을 재사용
+_clova_session = requests.Session()
+# Clova OCR 요청 message 중 요청마다 변하지 않는 부분 (닫는 괄호 제외)
+_CLOVA_MESSAGE_PREFIX = json.dumps({
+    'images': [
+        {
+            'format': 'jpg',
+            'name': 'demo'
+        }
+    ],
+    'version': 'V2'
+})[:-1]
+
+
+def _get_content_key(binary_image: bytes) -> bytes:
+    # 결과 cache의 key로 쓰는 이미지 내용 hash
+    return hashlib.blake2b(binary_image, digest_size=16).digest()
+
+
+def _run_event_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+    finally:
+        loop.close()
+
+
+def _to_ocr_array(image: Image.Image) -> np.ndarray:
+    # PaddleOCR은 cv2와 같은 BGR 배열을 입력으로 받는다
+    return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
 
 class ImageOCR:
     def __init__(self) -> None:
+        # 각 모델은 처음 사용될 때 로딩된다 (사용하지 않는 파이프라인은 로딩 비용 없음)
+        # 이미지 내용 hash -> 변환 결과 (여러 페이지에 반복되는 이미지는 다시 변환하지 않음)
+        self.result_cache = LRUCache(maxsize=RESULT_CACHE_SIZE)
+
+    def close(self) -> None:
+        '''
+        ImageOCR가 띄운 ocr worker process와 Gemini event loop를 정리합니다
+        '''
+        self._shutdown_ocr_pool()
+
+        gemini_loop = self.__dict__.pop("gemini_loop", None)
+        if gemini_loop is not None:
+            gemini_loop.call_soon_threadsafe(gemini_loop.stop)
+
+    def __del__(self) -> None:
+        self.close()
+
+    def _shutdown_ocr_pool(self) -> None:
+        # 아직 pool을 만든 적이 없으면 cached_property를 건드리지 않는다
+        ocr_pool = self.__dict__.pop("ocr_pool", None)
+        if ocr_pool is not None:
+            ocr_pool.shutdown(wait=False, cancel_futures=True)
+
+    @cached_property
+    def ocr_model(self) -> PaddleOCR:
         # OCR Model init
-        self.ocr_model = PaddleOCR(lang='korean')
+        return build_ocr_model(os.cpu_count() or 1)
+
+    @cached_property
+    def ocr_pool(self) -> ProcessPoolExecutor:
+        # PaddleOCR은 batch 추론을 지원하지 않으므로 process마다 모델을 두고 병렬 처리
+        return ProcessPoolExecutor(
+            max_workers=OCR_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_ocr_worker,
+            # worker끼리 core를 나눠 쓰도록 thread 수를 분배
+            initargs=(max(1, (os.cpu_count() or 1) // OCR_MAX_WORKERS),))
 
+    @cached_property
+    def classifier_processor(self):
         # Classification Model
-        checkpoint = "google/siglip2-so400m-patch14-384"
-        self.image_classifier = pipeline(
-            task="zero-shot-image-classification", model=checkpoint)
+        return AutoProcessor.from_pretrained(CLASSIFIER_CHECKPOINT)
 
+    @cached_property
+    def classifier_model(self):
+        return AutoModel.from_pretrained(CLASSIFIER_CHECKPOINT).eval()
+
+    @cached_property
+    def label_embeddings_T(self) -> torch.Tensor:
+        # label은 고정값이므로 text tower는 한 번만 실행하고 결과를 재사용
+        texts = [CLASSIFIER_HYPOTHESIS.format(label)
+                 for label in ALL_LABELS]
+        inputs = self.classifier_processor(
+            text=texts, padding="max_length", max_length=64, return_tensors="pt")
+        with torch.inference_mode():
+            text_embeds = self.classifier_model.get_text_features(**inputs)
+        # image embedding과 바로 곱할 수 있도록 (dim, label) 형태로 저장
+        return F.normalize(text_embeds, dim=-1).T.contiguous()
+
+    @cached_property
+    def formula_processor(self):
         # Formula Model
-        self.formula_processor = AutoProcessor.from_pretrained(
+        processor = AutoProcessor.from_pretrained(
             "ds4sd/SmolDocling-256M-preview", use_fast=True)
-        self.formula_model = AutoModelForImageTextToText.from_pretrained(
-            "ds4sd/SmolDocling-256M-preview").to("cpu")
-        self.formula_prompt = self.formula_processor.apply_chat_template(
+        # batch generate 시 prompt 끝이 맞춰지도록 왼쪽 padding
+        processor.tokenizer.padding_side = "left"
+        return processor
+
+    @cached_property
+    def formula_model(self):
+        # 가중치를 meta tensor 위에 바로 올려서 추가 복사본 없이 로딩
+        model = AutoModelForImageTextToText.from_pretrained(
+            "ds4sd/SmolDocling-256M-preview",
+            torch_dtype=torch.float32,
+            low_cpu_mem_usage=True,
+            device_map="cpu")
+        # CPU decode는 weight 읽기가 병목이므로 Linear weight를 int8로 양자화
+        # (inplace=False면 deepcopy로 fp32 모델이 한 벌 더 생기므로 제자리에서 변환)
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+        # decode step마다의 dispatch 비용을 줄이기 위해 forward를 compile
+        if FORMULA_MODEL_COMPILE:
+            model.forward = torch.compile(model.forward, dynamic=True)
+
+        return model
+
+    @cached_property
+    def formula_prompt(self) -> str:
+        return self.formula_processor.apply_chat_template(
             FORMULA_OCR_MESSAGE, add_generation_prompt=True)
 
+    @cached_property
+    def client(self) -> genai.Client:
         # Graph LMM
-        self.client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+        return genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+
+    @cached_property
+    def gemini_loop(self) -> asyncio.AbstractEventLoop:
+        # client.aio의 connection pool이 하나의 loop에만 묶이도록 전용 thread에서 loop를 계속 실행
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=_run_event_loop, args=(loop,),
+                         name="gemini-event-loop", daemon=True).start()
+        return loop
 
-    def convert_img_to_txt(self, encode_image: str) -> str:
+    def convert_img_to_txt(self, encode_image: Union[bytes, str]) -> Optional[str]:
         '''
         이미지를 분류하고 각 카테고리에 따라서 str, latex, None으로 값을 리턴
         Args:
-            encode_image(bytes): encoding된 image 데이터
+            encode_image(bytes|str): image 원본 bytes 또는 base64로 encoding된 str
         Return:
             image_type(str): 이미지 형태 리턴 IMAGE_CATEGORY의 값 중 하나이다
-            ocr_text(str|None): 이미지를 변환한 데이터 str 값
+            ocr_text(str|None): 이미지를 변환한 데이터 str 값, 변환에 실패하면 None
         '''
         try:
-            binary_image = base64.b64decode(encode_image)
-            image = Image.open(io.BytesIO(binary_image)).convert("RGB")
+            binary_image = self._to_binary_image(encode_image)
+            cache_key = _get_content_key(binary_image)
+            if cache_key in self.result_cache:
+                logger.info("Use cached result")
+                return self.result_cache[cache_key]
+
+            image = self._open_image(binary_image)
             logger.info("Success loading image")
         except Exception as e:
             logger.error(f"Failed loading image: {e}")
@@ -62,16 +212,121 @@ class ImageOCR:
 
         try:
             image_type = self._classificate_image(image)
+            category = LABEL_TO_CATEGORY.get(image_type)
 
-            if image_type in IMAGE_CATEGORY['Text']:
-                return self.extract_text(binary_image)
-            elif image_type in IMAGE_CATEGORY['Formula']:
-                return fr"{self._extract_formula_from_image(image)}"
+            if category == 'Text':
+                result = self.extract_text(_to_ocr_array(image))
+            elif category == 'Formula':
+                result = self._extract_formula_from_image(image)
             else:
-                return self.get_caption_with_gemini(binary_image)
+                result = self.get_caption_with_gemini(binary_image)
 
-        except Exception as e:
-            return encode_image
+            # 분류 실패로 Graph 분기를 탄 결과나 빈 결과는 일시적인 오류일 수 있으므로 cache 하지 않는다
+            if image_type is not None and result is not None:
+                self.result_cache[cache_key] = result
+            return result
+
+        except Exception:
+            logger.exception("Failed converting image")
+            return None
+
+    def convert_images_to_txt(self, encode_images: List[Union[bytes, str]]) -> List[Optional[str]]:
+        '''
+        여러 이미지를 한 번에 분류한 뒤 카테고리별로 묶어서 변환
+        Args:
+            encode_images(List[bytes|str]): image 원본 bytes 또는 base64 str 목록
+        Return:
+            results(List[str|None]): 입력과 같은 순서의 변환 결과, 실패한 이미지는 None
+        '''
+        results = [None] * len(encode_images)
+
+        indices, binary_images, images, cache_keys = [], [], [], []
+        # 같은 batch 안에서 먼저 나온 이미지와 내용이 같은 index 목록
+        duplicates = {}
+        for index, encode_image in enumerate(encode_images):
+            try:
+                binary_image = self._to_binary_image(encode_image)
+                cache_key = _get_content_key(binary_image)
+                if cache_key in self.result_cache:
+                    results[index] = self.result_cache[cache_key]
+                    continue
+                if cache_key in duplicates:
+                    duplicates[cache_key].append(index)
+                    continue
+
+                image = self._open_image(binary_image)
+            except Exception as e:
+                logger.error(f"Failed loading image {index}: {e}")
+                continue
+            duplicates[cache_key] = []
+            indices.append(index)
+            binary_images.append(binary_image)
+            images.append(image)
+            cache_keys.append(cache_key)
+        logger.info(f"Success loading {len(images)}/{len(encode_images)} images")
+
+        if not images:
+            return results
+
+        image_types = self._classificate_images(images)
+        text_batch, formula_batch, graph_batch = [], [], []
+        for position, image_type in enumerate(image_types):
+            category = LABEL_TO_CATEGORY.get(image_type)
+            if category == 'Text':
+                text_batch.append(position)
+            elif category == 'Formula':
+                formula_batch.append(position)
+            else:
+                graph_batch.append(position)
+
+        # Text, Graph는 이미지별로 실패를 None으로 돌려주고, Formula는 generate 단위(chunk)로 실패
+        def _fill(batch: List[int], convert: Callable[[List[int]], List[Optional[str]]]) -> None:
+            if not batch:
+                return
+            try:
+                outputs = convert(batch)
+            except Exception:
+                logger.exception("Failed converting images")
+                outputs = [None] * len(batch)
+            else:
+                for position, output in zip(batch, outputs):
+                    # 실패했거나 분류에 실패한 이미지는 다음 호출에서 다시 변환하도록 cache 하지 않는다
+                    if output is not None and image_types[position] is not None:
+                        self.result_cache[cache_keys[position]] = output
+            for position, output in zip(batch, outputs):
+                results[indices[position]] = output
+                for index in duplicates[cache_keys[position]]:
+                    results[index] = output
+
+        def _extract_texts(batch: List[int]) -> List[Optional[str]]:
+            # 이미지가 하나뿐이면 worker를 띄우지 않고 decode된 이미지로 바로 처리
+            if len(batch) == 1:
+                return [self.extract_text(_to_ocr_array(images[batch[0]]))]
+            return self.extract_text_batch([binary_images[position] for position in batch])
+
+        _fill(text_batch, _extract_texts)
+        for start in range(0, len(formula_batch), FORMULA_BATCH_SIZE):
+            _fill(formula_batch[start:start + FORMULA_BATCH_SIZE],
+                  lambda batch: self._extract_formulas_from_images(
+                      [images[position] for position in batch]))
+        # Gemini 호출은 I/O 대기이므로 비동기로 동시에 요청
+        _fill(graph_batch, lambda batch: self._get_captions_with_gemini(
+            [binary_images[position] for position in batch]))
+
+        return results
+
+    def _to_binary_image(self, encode_image: Union[bytes, str]) -> bytes:
+        if isinstance(encode_image, str):
+            return base64.b64decode(encode_image)
+        # 원본 bytes는 base64 왕복 없이 그대로 사용
+        return encode_image
+
+    def _open_image(self, binary_image: bytes) -> Image.Image:
+        with io.BytesIO(binary_image) as buffer:
+            image = Image.open(buffer).convert("RGB")
+            # buffer가 닫히기 전에 pixel 데이터를 모두 읽어둔다
+            image.load()
+        return image
 
     def _classificate_image(self, image: Image.Image) -> str:
         '''
@@ -81,17 +336,48 @@ class ImageOCR:
         Return:
             label: image label
         '''
+        return self._classificate_images([image])[0]
+
+    def _classificate_images(self, images: List[Image.Image]) -> List[Optional[str]]:
+        '''
+        여러 이미지를 image tower 한 번의 forward로 분류
+        Args:
+            images(List[Image.Image]): pillow image data composed RGB
+        Return:
+            labels(List[str|None]): 이미지별 label, 실패하면 None
+        '''
         try:
-            candidate_labels = list(chain(*IMAGE_CATEGORY.values()))
-            outputs = self.image_classifier(
-                image, candidate_labels=candidate_labels)
-            best_output = max(outputs, key=lambda x: x["score"])['label']
-            logger.info(f"classificate image: {best_output}")
+            # 원본 해상도는 formula 모델에만 넘기고 분류는 작은 이미지로 전처리
+            small_images = [self._resize_for_classifier(image) for image in images]
+            inputs = self.classifier_processor(images=small_images, return_tensors="pt")
+            # image embedding의 norm은 양수 scale이라 argmax에 영향이 없으므로 정규화 생략
+            with torch.inference_mode():
+                image_embeds = self.classifier_model.get_image_features(**inputs)
+                best_indices = (image_embeds @ self.label_embeddings_T).argmax(dim=-1)
+
+            best_outputs = [ALL_LABELS[index]
+                            for index in best_indices.tolist()]
+            logger.info(f"classificate image: {best_outputs}")
 
-            return best_output
+            return best_outputs
 
         except Exception as e:
             logger.error(f"Failed classificate image: {e}")
+            return [None] * len(images)
+
+    def _resize_for_classifier(self, image: Image.Image) -> Image.Image:
+        '''
+        classifier 입력 크기보다 큰 이미지를 한 번에 줄입니다
+        Args:
+            image(Image.Image): pillow image data composed RGB
+        Return:
+            image(Image.Image): classifier 입력 크기로 줄인 image
+        '''
+        size = self.classifier_processor.image_processor.size
+        target = (size["width"], size["height"])
+        if image.width <= target[0] and image.height <= target[1]:
+            return image
+        return image.resize(target, Image.BILINEAR, reducing_gap=2.0)
 
     def _extract_formula_from_image(self, image: Image.Image) -> str:
         '''
@@ -101,17 +387,34 @@ class ImageOCR:
         Return:
             latex_result(str): 추출된 latex를 str으로 변환하여 리턴
         '''
-        inputs = self.formula_processor(text=self.formula_prompt, images=[
-                                        image], return_tensors="pt").to("cpu")
+        return self._extract_formulas_from_images([image])[0]
 
-        generated_ids = self.formula_model.generate(
-            **inputs, max_new_tokens=500)
-        generated_text = self.formula_processor.batch_decode(
-            generated_ids, skip_special_tokens=True)[0]
+    def _extract_formulas_from_images(self, images: List[Image.Image]) -> List[str]:
+        '''
+        여러 formula 이미지를 한 번의 generate로 추출 합니다
+        Args:
+            images(List[Image.Image]): pillow.Image.Image 타입의 image 데이터 목록
+        Return:
+            latex_results(List[str]): 이미지 순서대로 추출된 latex
+        '''
+        inputs = self.formula_processor(
+            text=[self.formula_prompt] * len(images),
+            images=[[image] for image in images],
+            padding=True,
+            return_tensors="pt").to(
+            self.formula_model.device, dtype=self.formula_model.dtype)
 
-        latex_result = self._convert_text_to_latex(generated_text)
+        generated_ids = self.formula_model.generate(
+            **inputs,
+            max_new_tokens=FORMULA_MAX_NEW_TOKENS,
+            use_cache=True)
+        if generated_ids.shape[1] - inputs["input_ids"].shape[1] >= FORMULA_MAX_NEW_TOKENS:
+            logger.warning(
+                f"Formula generation hit max_new_tokens={FORMULA_MAX_NEW_TOKENS}, latex may be truncated")
+        generated_texts = self.formula_processor.batch_decode(
+            generated_ids, skip_special_tokens=True)
 
-        return latex_result
+        return [self._convert_text_to_latex(text) for text in generated_texts]
 
     def _convert_text_to_latex(self, text: str):
         '''
@@ -121,37 +424,66 @@ class ImageOCR:
         Return:
             latex_text(str): 유효한 수식 패턴이 감지되면 LaTeX 형식으로 반환하고, 그렇지 않으면 원본 텍스트를 반환합니다.
         '''
-        text = re.sub(
-            r"User:\s*Extract mathematical expressions in LaTeX format\s*Assistant: 0>0>500>500>", "", text)
-        text = re.sub(r"\\, \.$", "", text)
+        text = _FORMULA_PROMPT_RE.sub("", text)
+        text = _FORMULA_TAIL_RE.sub("", text)
         return f"${text}$"
 
-    def extract_text(self, binary_image: bytes) -> str:
-        ocr_result = self.ocr_model.ocr(binary_image, cls=False)
-        texts = " ".join(text for _, (text, _) in ocr_result[0])
+    def extract_text(self, np_image: np.ndarray) -> str:
+        ocr_result = self.ocr_model.ocr(np_image, cls=False)
+        texts = join_ocr_result(ocr_result)
 
         return texts
 
-    def _extract_text_from_image_with_azure(binary_image: bytes) -> str:
+    def extract_text_batch(self, binary_images: List[bytes]) -> List[Optional[str]]:
+        '''
+        여러 이미지의 텍스트를 ocr worker process에서 병렬로 추출합니다
+        Args:
+            binary_images(List[bytes]): bytes 타입의 Image 목록
+        Return:
+            texts(List[str|None]): 이미지 순서대로 추출한 text, 실패한 이미지는 None
+        '''
+        # worker로는 decode된 배열보다 작은 압축 bytes를 넘긴다
+        try:
+            return list(self.ocr_pool.map(extract_text_in_worker, binary_images))
+        except BrokenProcessPool:
+            # worker가 비정상 종료되면 executor를 다시 쓸 수 없으므로 새로 만들어 한 번 재시도
+            logger.exception("OCR worker pool is broken, restarting pool")
+            self._shutdown_ocr_pool()
+            return list(self.ocr_pool.map(extract_text_in_worker, binary_images))
+
+    def _extract_text_from_image_with_azure(self, binary_images: List[bytes]) -> List[str]:
         '''
         azure document ai로 이미지에서 텍스트를 추출합니다
         Args:
-            Image(bytes): bytes 타입의 Image
+            binary_images(List[bytes]): bytes 타입의 Image 목록
         Return:
-            text(str): image에서 추출한 text
+            texts(List[str]): 이미지 순서대로 추출한 text
         '''
+        if not binary_images:
+            return []
+
+        # 이미지를 한 장씩 보내지 않고 다중 페이지 PDF 하나로 묶어서 한 번만 요청
+        images = [self._open_image(binary_image) for binary_image in binary_images]
+        with io.BytesIO() as buffer:
+            images[0].save(buffer, format="PDF", save_all=True,
+                           append_images=images[1:])
+            pdf_bytes = buffer.getvalue()
+
         OCRLoader = AzureAIDocumentIntelligenceLoader(
             api_endpoint=os.getenv("AZURE_COGNITIVE_API_ENDPOINT"),
             api_key=os.getenv("AZURE_COGNITIVE_API_KEY"),
             api_model="prebuilt-layout",
-            bytes_source=binary_image,
+            bytes_source=pdf_bytes,
             mode="page"
         )
         documents = OCRLoader.load()
-        texts = [doc.page_content for doc in documents]
-        return " ".join(texts)
 
-    def _extract_text_from_image_with_clova(binary_image: bytes) -> str:
+        texts = [""] * len(images)
+        for doc in documents:
+            texts[doc.metadata["page"] - 1] = doc.page_content
+        return texts
+
+    def _extract_text_from_image_with_clova(self, binary_image: bytes) -> str:
         '''
         clova ocr로 이미지에서 텍스트를 추출합니다
         Args:
@@ -159,37 +491,73 @@ class ImageOCR:
         Return:
             text(str): image에서 추출한 text
         '''
-        request_json = {
-            'images': [
-                {
-                    'format': 'jpg',
-                    'name': 'demo'
-                }
-            ],
-            'requestId': str(uuid.uuid4()),
-            'version': 'V2',
-            'timestamp': int(round(time.time() * 1000))
-        }
+        # 요청마다 바뀌는 requestId, timestamp만 고정된 message 뒤에 붙인다
+        message = (f'{_CLOVA_MESSAGE_PREFIX}, "requestId": "{uuid.uuid4()}", '
+                   f'"timestamp": {int(round(time.time() * 1000))}}}')
 
-        payload = {'message': json.dumps(request_json).encode('UTF-8')}
+        payload = {'message': message.encode('UTF-8')}
         files = [('file', binary_image)]
         headers = {'X-OCR-SECRET': os.getenv('NAVER_API_KEY')}
 
-        response = requests.request("POST", os.getenv(
-            'AZURE_COGNITIVE_API_KEY'), headers=headers, data=payload, files=files)
+        response = _clova_session.post(os.getenv(
+            'NAVER_API_URL'), headers=headers, data=payload, files=files)
 
         return response.text.encode('utf8')
 
     def get_caption_with_gemini(self, binary_image: bytes):
         response = self.client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=[
-                genai.types.Part.from_bytes(
-                    data=binary_image,
-                    mime_type='image/jpeg',
-                ),
-                '이 그래프에 대한 설명을 간단하게 적어줘.'
-            ]
+            model=GEMINI_MODEL,
+            contents=self._build_gemini_contents(binary_image)
+        )
+
+        return response.text
+
+    def _get_captions_with_gemini(self, binary_images: List[bytes]) -> List[Optional[str]]:
+        # 호출 측에서 이미 loop가 실행 중이어도 동작하도록 전용 loop에 제출하고 결과를 기다린다
+        future = asyncio.run_coroutine_threadsafe(
+            self.get_captions_batch(binary_images), self.gemini_loop)
+        return future.result()
+
+    async def get_captions_batch(self, binary_images: List[bytes]) -> List[Optional[str]]:
+        '''
+        여러 그래프 이미지의 caption을 동시에 요청합니다
+        Args:
+            binary_images(List[bytes]): bytes 타입의 Image 목록
+        Return:
+            captions(List[str|None]): 이미지 순서대로 생성된 caption, 실패한 이미지는 None
+        '''
+        # rate limit을 넘지 않도록 동시 요청 수를 제한
+        semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+        async def _caption(binary_image: bytes) -> str:
+            async with semaphore:
+                return await self._caption_async(binary_image)
+
+        # 한 이미지의 실패(rate limit, safety block 등)가 나머지 caption을 버리지 않도록 이미지별로 처리
+        outputs = await asyncio.gather(
+            *[_caption(binary_image) for binary_image in binary_images], return_exceptions=True)
+
+        captions = []
+        for output in outputs:
+            if isinstance(output, BaseException):
+                logger.error(f"Failed captioning image with gemini: {output}")
+                output = None
+            captions.append(output)
+        return captions
+
+    async def _caption_async(self, binary_image: bytes) -> str:
+        response = await self.client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=self._build_gemini_contents(binary_image)
         )
 
         return response.text
+
+    def _build_gemini_contents(self, binary_image: bytes) -> list:
+        return [
+            genai.types.Part.from_bytes(
+                data=binary_image,
+                mime_type='image/jpeg',
+            ),
+            '이 그래프에 대한 설명을 간단하게 적어줘.'
+        ]
@@ -0,0 +1,38 @@
+from typing import Optional
+from paddleocr import PaddleOCR
+from utils.logger import init_logger
+
+
+# ocr worker process는 이 module만 import 하므로 PaddleOCR 외의 무거운 의존성은 두지 않는다
+logger = init_logger(__file__, "DEBUG")
+
+# ocr worker process마다 하나씩 생성되는 PaddleOCR 인스턴스
+_worker_ocr_model = None
+
+
+def build_ocr_model(cpu_threads: int) -> PaddleOCR:
+    # angle classifier는 사용하지 않으므로 로딩하지 않고, oneDNN(MKLDNN) kernel 사용
+    return PaddleOCR(lang='korean', use_angle_cls=False,
+                     enable_mkldnn=True, cpu_threads=cpu_threads)
+
+
+def init_ocr_worker(cpu_threads: int) -> None:
+    global _worker_ocr_model
+    _worker_ocr_model = build_ocr_model(cpu_threads)
+
+
+def extract_text_in_worker(binary_image: bytes) -> Optional[str]:
+    # 한 이미지의 실패가 batch 전체의 실패로 번지지 않도록 이미지별로 처리
+    try:
+        ocr_result = _worker_ocr_model.ocr(binary_image, cls=False)
+        return join_ocr_result(ocr_result)
+    except Exception:
+        logger.exception("Failed extracting text in ocr worker")
+        return None
+
+
+def join_ocr_result(ocr_result: list) -> str:
+    # 검출된 text가 없으면 PaddleOCR은 [None]을 반환한다
+    if not ocr_result or not ocr_result[0]:
+        return ""
+    return " ".join(text for _, (text, _) in ocr_result[0])
@@ -17,6 +17,11 @@ IMAGE_CATEGORY = {
     ]
 }
 
+# label -> category 역색인 (분류 결과의 category를 O(1)로 조회)
+LABEL_TO_CATEGORY = {label: category for category, labels in IMAGE_CATEGORY.items()
+                     for label in labels}
+ALL_LABELS = tuple(LABEL_TO_CATEGORY)
+
 FORMULA_OCR_MESSAGE = [
     {
         "role": "user",